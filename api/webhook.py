@@ -1,33 +1,166 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
 import os
 import json
 import logging
+import logging.handlers
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import atexit
 import time
 import threading
+import queue
+from functools import lru_cache
+
+# Vercel freezes the instance between invocations; some background work is
+# only safe in long-lived (self-hosted) processes. VERCEL is only set when the
+# project exposes system env vars, so also detect the Lambda runtime underneath;
+# SERVERLESS=1/0 overrides detection either way
+_SERVERLESS = os.environ.get('SERVERLESS', '').strip().lower()
+if _SERVERLESS in ('1', 'true', 'yes'):
+    _ON_VERCEL = True
+elif _SERVERLESS in ('0', 'false', 'no'):
+    _ON_VERCEL = False
+else:
+    _ON_VERCEL = bool(os.environ.get('VERCEL') or os.environ.get('AWS_LAMBDA_FUNCTION_NAME'))
 
 # Setup logging
-logging.basicConfig(level=logging.INFO)
+# Production defaults to WARNING; set LOG_LEVEL=INFO (or DEBUG) when troubleshooting.
+# Vercel captures stderr per invocation, so log straight to it there. Long-lived
+# processes route records through a queue to a listener thread, so request
+# threads never block on the stderr write
+_LOG_LEVEL = os.environ.get('LOG_LEVEL', '').strip().upper() or 'WARNING'
+_log_level_valid = isinstance(logging.getLevelName(_LOG_LEVEL), int)
+_stderr_handler = logging.StreamHandler()
+logging.basicConfig(level=_LOG_LEVEL if _log_level_valid else logging.WARNING, handlers=[_stderr_handler])
 logger = logging.getLogger(__name__)
+_log_handler = None
+_log_listener = None
+
+
+def _start_log_listener():
+    """Put the stderr handler behind a QueueHandler + listener thread"""
+    global _log_handler, _log_listener
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.removeHandler(_log_handler or _stderr_handler)
+    _log_handler = logging.handlers.QueueHandler(log_queue)
+    root.addHandler(_log_handler)
+    _log_listener = logging.handlers.QueueListener(log_queue, _stderr_handler)
+    _log_listener.start()
+
+
+def _stop_log_listener():
+    _log_listener.stop()
+
+
+if not _log_level_valid:
+    logger.warning("⚠️ Invalid LOG_LEVEL %r, falling back to WARNING", _LOG_LEVEL)
+if _SERVERLESS and _SERVERLESS not in ('1', 'true', 'yes', '0', 'false', 'no'):
+    logger.warning("⚠️ Invalid SERVERLESS %r, auto-detected %s", _SERVERLESS,
+                   "serverless" if _ON_VERCEL else "long-lived process")
 
 # Import dependencies with error handling
 try:
     from sqlalchemy import create_engine, text
-    from sqlalchemy.pool import NullPool
-    import httpx
+    from sqlalchemy.exc import OperationalError, InterfaceError, TimeoutError as PoolTimeoutError
+    import psycopg2
+    from psycopg2.extras import execute_values
     logger.info("✅ All imports successful")
 except ImportError as e:
-    logger.error(f"❌ Import error: {e}")
+    logger.error("❌ Import error: %s", e)
     create_engine = None
-    httpx = None
+
+# Faster JSON (optional) - falls back to stdlib json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    _loads = json.loads
 
 # Initialize Flask app
 app = Flask(__name__)
+app.config.update(DEBUG=False, TESTING=False)
+# Any remaining jsonify() paths: skip key sorting and pretty-printing
+app.json.sort_keys = False
+app.json.compact = True
+
+
+def json_response(data, status=200):
+    """Serialize straight to a JSON response (orjson when available, no key sorting)"""
+    body = orjson.dumps(data) if orjson else json.dumps(data)
+    return app.response_class(body, status=status, mimetype='application/json')
+
 
 # Database connection
 DATABASE_URL = os.environ.get('DATABASE_URL', '').strip()
+
+# Bot tokens (read once at import, not per request)
+BOT_TOKEN = os.environ.get('BOT_TOKEN', '').strip()
+TGMS_BOT_TOKEN = os.environ.get('TGMS_BOT_TOKEN', '').strip()
+SWAP_BOT_TOKEN = os.environ.get('SWAP_BOT_TOKEN', '').strip()
+for _name, _token in (('BOT_TOKEN', BOT_TOKEN), ('TGMS_BOT_TOKEN', TGMS_BOT_TOKEN),
+                      ('SWAP_BOT_TOKEN', SWAP_BOT_TOKEN)):
+    if not _token:
+        logger.warning("⚠️ %s not set - that bot's updates cannot be processed", _name)
 engine = None
 
+
+def _env_int(name, default):
+    """Read a non-negative integer setting, falling back to `default` if it's unset or invalid"""
+    raw = os.environ.get(name, '').strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = -1
+    if value < 0:
+        logger.warning("⚠️ Invalid %s %r, using %s", name, raw, default)
+        return default
+    return value
+
+
+# Pool sizing: on Vercel each warm instance keeps a single connection (instances
+# x 1 must stay under Postgres max_connections); a long-running self-hosted
+# process serving many threads gets a larger pool
+DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 1 if _ON_VERCEL else 5)
+DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 0 if _ON_VERCEL else 10)
+
+# Keep connect time bounded so a slow database can't stall the webhook
+DB_CONNECT_TIMEOUT = 3
+DB_CONNECT_ARGS = {
+    "sslmode": "require",
+    "connect_timeout": DB_CONNECT_TIMEOUT,
+}
+# A request may queue behind a connect already in flight (on Vercel the pool is
+# a single connection and the cold-start warm-up holds it), so wait longer for
+# a pooled connection than a connect can take
+DB_POOL_TIMEOUT = DB_CONNECT_TIMEOUT + 1
+# Statement timeout is opt-in: it's sent as the `options` startup parameter,
+# which PgBouncer-based poolers (e.g. Neon "-pooler" hosts) reject. Behind a
+# pooler, set it server-side instead: ALTER ROLE <user> SET statement_timeout = '5s'
+DB_STATEMENT_TIMEOUT_MS = _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+if DB_STATEMENT_TIMEOUT_MS:
+    DB_CONNECT_ARGS["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+# Job INSERTs go straight to the psycopg2 cursor (SQLAlchemy only manages the
+# pool); execute_values expands %s into one multi-row VALUES list per batch.
+# (created_at / updated_at come from the column defaults in schema.sql)
+_INSERT_JOBS_SQL = "INSERT INTO jobs (job_type, bot_token, payload, status) VALUES %s"
+_INSERT_JOBS_TEMPLATE = "(%(job_type)s, %(bot_token)s, %(payload)s, 'pending')"
+
+def _warmup():
+    """Open the first pooled connection up front so the first webhook doesn't pay for it"""
+    try:
+        # Open the pooled connection now; the pool keeps it for the first request
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        logger.info("✅ Database connected successfully")
+    except Exception as e:
+        logger.error("❌ Database connection failed: %s", e)
+
+
 def init_db():
     """Initialize database connection"""
     global engine
@@ -38,76 +171,372 @@ def init_db():
     try:
         engine = create_engine(
             DATABASE_URL,
-            poolclass=NullPool,
-            pool_pre_ping=True,
-            connect_args={"sslmode": "require"},
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=300,
+            pool_timeout=DB_POOL_TIMEOUT,
+            # No SELECT 1 per checkout - insert_jobs() reconnects on failure instead
+            pool_pre_ping=False,
+            connect_args=DB_CONNECT_ARGS,
+            # Single-row INSERTs: skip the BEGIN/COMMIT round trips
+            isolation_level="AUTOCOMMIT",
             echo=False
         )
         
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        
-        logger.info("✅ Database connected successfully")
+        if _ON_VERCEL:
+            # Don't hold up import on a DB round trip; connect on a side thread
+            threading.Thread(target=_warmup, name="db-warmup", daemon=True).start()
+        else:
+            # Import may run in a pre-forking master (gunicorn --preload), which
+            # must not have other threads alive when it forks
+            _warmup()
         return True
         
     except Exception as e:
-        logger.error(f"❌ Database connection failed: {e}")
+        logger.error("❌ Database engine creation failed: %s", e)
         return False
 
 # Initialize DB
 try:
     init_db()
 except Exception as e:
-    logger.error(f"❌ DB initialization error: {e}")
+    logger.error("❌ DB initialization error: %s", e)
 
 
-def send_typing_action(bot_token, chat_id, duration=5):
-    """Send typing action for specified duration (in background)"""
-    if not httpx or not bot_token or not chat_id:
+def insert_jobs(rows):
+    """Insert job rows in one statement, retrying once if the pooled connection is stale or unavailable"""
+    for attempt in range(2):
+        try:
+            conn = engine.raw_connection()
+            try:
+                with conn.cursor() as cur:
+                    execute_values(cur, _INSERT_JOBS_SQL, rows,
+                                   template=_INSERT_JOBS_TEMPLATE, page_size=JOB_BATCH_SIZE)
+            finally:
+                conn.close()
+            return
+        except (OperationalError, InterfaceError, PoolTimeoutError,
+                psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            if attempt:
+                raise
+            logger.warning("⚠️ DB connection unavailable, retrying insert: %s", e)
+            engine.dispose()
+
+
+# Background Telegram calls so the webhook can return without waiting on them
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tg")
+atexit.register(_executor.shutdown, wait=True)
+
+# Micro-batching (long-lived processes only - Vercel inserts inline, see
+# queue_job()): a single writer thread drains the job queue, gathering
+# everything that arrives within JOB_FLUSH_INTERVAL of the first job (up to
+# JOB_BATCH_SIZE rows) into one INSERT. The queue is bounded; once it's full,
+# queue_job() falls back to inserting synchronously.
+JOB_BATCH_SIZE = 256
+JOB_FLUSH_INTERVAL = 0.015
+JOB_QUEUE_MAX = 2048
+
+_job_queue = queue.Queue(maxsize=JOB_QUEUE_MAX)
+_job_writer_thread = None
+
+
+def _write_jobs(rows):
+    try:
+        insert_jobs(rows)
+        return
+    except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+        # One bad row fails the whole multi-row INSERT; every update here has
+        # already been acknowledged, so fall back to row-by-row and lose only it
+        if len(rows) == 1:
+            logger.error("❌ Job rejected by the database: %s (payload: %r)", e, rows[0]['payload'])
+            return
+        logger.warning("⚠️ Batch of %s job(s) rejected, retrying one at a time: %s", len(rows), e)
+    except Exception as e:
+        logger.error("❌ Failed to queue %s job(s): %s", len(rows), e, exc_info=True)
         return
     
-    def _send_typing():
-        try:
-            url = f"https://api.telegram.org/bot{bot_token}/sendChatAction"
-            end_time = time.time() + duration
-            
-            while time.time() < end_time:
-                try:
-                    httpx.post(
-                        url,
-                        json={"chat_id": chat_id, "action": "typing"},
-                        timeout=2.0
-                    )
-                    logger.info(f"✅ Sent typing action to chat {chat_id}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to send typing: {e}")
-                    break
-                
-                # Telegram typing lasts ~5 seconds, so send again after 4 seconds
-                time.sleep(4)
-                
-        except Exception as e:
-            logger.warning(f"⚠️ Typing thread error: {e}")
+    for row in rows:
+        _write_jobs([row])
+
+
+def _job_writer():
+    """Consume the job queue in batches until a None sentinel arrives"""
+    while True:
+        job = _job_queue.get()
+        if job is None:
+            return
+        
+        rows = [job]
+        stopping = False
+        deadline = time.monotonic() + JOB_FLUSH_INTERVAL
+        while len(rows) < JOB_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = _job_queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if job is None:
+                stopping = True
+                break
+            rows.append(job)
+        
+        _write_jobs(rows)
+        if stopping:
+            return
+
+
+def _start_job_writer():
+    global _job_writer_thread
+    _job_writer_thread = threading.Thread(target=_job_writer, name="job-writer", daemon=True)
+    _job_writer_thread.start()
+
+
+def _stop_job_writer():
+    """Flush whatever is still queued before the process exits"""
+    try:
+        _job_queue.put(None, timeout=5)
+    except queue.Full:
+        logger.error("❌ Job queue still full at shutdown, pending jobs may be lost")
+        return
+    _job_writer_thread.join(timeout=5)
+
+
+_background_lock = threading.Lock()
+_background_started = False
+
+
+def _start_background_threads():
+    """Start the log listener and job writer on first use rather than at import.
     
-    # Run in background thread (non-blocking)
-    thread = threading.Thread(target=_send_typing, daemon=True)
-    thread.start()
+    With gunicorn --preload the import runs in the master, and forking a
+    process that already has threads running can hand the worker a lock that
+    is held forever. Started lazily, the threads only ever exist in workers.
+    """
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _start_log_listener()
+        _start_job_writer()
+        # atexit runs in reverse: flush the jobs, then the logs about them
+        atexit.register(_stop_log_listener)
+        atexit.register(_stop_job_writer)
+        _background_started = True
+
+
+def _after_fork_in_child():
+    # Workers forked after import (gunicorn --preload) must not reuse the
+    # parent's pooled connection
+    if engine:
+        engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def queue_job(job_type, bot_token, payload):
+    """Persist the job for the worker.
+    
+    On Vercel the row is inserted before returning: the instance is frozen once
+    the response is sent (atexit never runs), so a queued row could be lost
+    after Telegram already got its 200. Long-lived processes hand it to the
+    writer thread and return immediately.
+    
+    `payload` is the update's JSON text; it's stored as-is in jobs.payload.
+    """
+    row = {
+        'job_type': job_type,
+        'bot_token': bot_token,
+        'payload': payload
+    }
+    
+    if _ON_VERCEL:
+        insert_jobs([row])
+        return
+    
+    if not _background_started:
+        _start_background_threads()
+    
+    try:
+        _job_queue.put_nowait(row)
+    except queue.Full:
+        # Writer is falling behind - write this one inline rather than drop it
+        logger.warning("⚠️ Job queue full, inserting synchronously")
+        insert_jobs([row])
+
+
+# Shared Telegram client: keeps the TLS connection to api.telegram.org alive
+# across requests served by the same warm instance. Created on first use so a
+# cold start that only serves the health check never imports httpx.
+_tg_client = None
+_tg_client_lock = threading.Lock()
+
+
+def get_tg_client():
+    """Return the shared httpx client, or None if httpx is unavailable"""
+    global _tg_client
+    if _tg_client is not None:
+        return _tg_client
+    with _tg_client_lock:
+        if _tg_client is None:
+            try:
+                import httpx
+            except ImportError as e:
+                logger.error("❌ Import error: %s", e)
+                return None
+            limits = httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60)
+            try:
+                client = httpx.Client(http2=True, timeout=2.0, limits=limits)
+            except ImportError:
+                # h2 not installed - fall back to HTTP/1.1 keep-alive
+                client = httpx.Client(timeout=2.0, limits=limits)
+            atexit.register(client.close)
+            _tg_client = client
+    return _tg_client
+
+
+@lru_cache(maxsize=None)
+def _tg_url(bot_token, method):
+    """Bot API URL for a token/method pair, built once and reused"""
+    return f"https://api.telegram.org/bot{bot_token}/{method}"
+
+
+# Pre-build the per-update URLs for the configured bots
+for _token in (BOT_TOKEN, TGMS_BOT_TOKEN):
+    if _token:
+        _tg_url(_token, "sendChatAction")
+        _tg_url(_token, "answerCallbackQuery")
+
+
+def _post_typing(bot_token, chat_id):
+    client = get_tg_client()
+    if client is None:
+        return
+    try:
+        client.post(
+            _tg_url(bot_token, "sendChatAction"),
+            json={"chat_id": chat_id, "action": "typing"},
+            timeout=2.0
+        )
+    except Exception as e:
+        logger.warning("⚠️ Failed to send typing: %s", e)
+
+
+def send_typing_action(bot_token, chat_id):
+    """Send one typing action in the background (Telegram shows it for ~5 seconds)"""
+    if not bot_token or not chat_id:
+        return
+    
+    _executor.submit(_post_typing, bot_token, chat_id)
 
 
 def answer_callback_query(bot_token, callback_query_id):
     """Answer callback query immediately"""
-    if not httpx or not bot_token or not callback_query_id:
+    if not bot_token or not callback_query_id:
+        return
+    
+    client = get_tg_client()
+    if client is None:
         return
     
     try:
-        httpx.post(
-            f"https://api.telegram.org/bot{bot_token}/answerCallbackQuery",
+        client.post(
+            _tg_url(bot_token, "answerCallbackQuery"),
             json={"callback_query_id": callback_query_id},
             timeout=2.0
         )
-        logger.info("✅ Answered callback query")
     except Exception as e:
-        logger.warning(f"⚠️ Failed to answer callback: {e}")
+        logger.warning("⚠️ Failed to answer callback: %s", e)
+
+
+def send_immediate_responses(bot_token, chat_id, callback_query_id):
+    """Answer the callback query and fire the typing indicator"""
+    # 1. Answer callback query if present (removes loading state). On Vercel this
+    # must finish before the response: a frozen instance wouldn't send it until
+    # some later request thawed it, leaving the button spinner hanging
+    if callback_query_id:
+        if _ON_VERCEL:
+            answer_callback_query(bot_token, callback_query_id)
+        else:
+            _executor.submit(answer_callback_query, bot_token, callback_query_id)
+    
+    # 2. Send typing action (shown for ~5 seconds)
+    if chat_id:
+        send_typing_action(bot_token, chat_id)
+
+
+
+# Health check: the environment snapshot never changes after import, and the
+# serialized body is cached briefly so frequent probes are just a buffer copy
+HEALTH_ENVIRONMENT = {
+    "DATABASE_URL": "set" if DATABASE_URL else "not set",
+    "BOT_TOKEN": "set" if BOT_TOKEN else "not set",
+    "TGMS_BOT_TOKEN": "set" if TGMS_BOT_TOKEN else "not set",
+    "SWAP_BOT_TOKEN": "set" if SWAP_BOT_TOKEN else "not set"
+}
+HEALTH_CACHE_TTL = 1.0
+_health_cache = (0.0, None)
+
+
+def get_health_body():
+    """Return the serialized health check, rebuilt at most once per HEALTH_CACHE_TTL"""
+    global _health_cache
+    
+    now = time.monotonic()
+    cached_at, cached = _health_cache
+    if cached is not None and now - cached_at < HEALTH_CACHE_TTL:
+        return cached
+    
+    health_status = {
+        "status": "ok",
+        "timestamp": datetime.utcnow().isoformat(),
+        "database": "connected" if engine else "not connected",
+        "environment": HEALTH_ENVIRONMENT
+    }
+    body = orjson.dumps(health_status) if orjson else json.dumps(health_status)
+    _health_cache = (now, body)
+    return body
+
+
+
+def read_update():
+    """Shared POST preamble for every bot route.
+    
+    Returns (update_data, None), or (None, error_response) when the database
+    is unavailable or the body isn't a usable update.
+    """
+    if not engine:
+        logger.error("❌ Database not available for webhook processing")
+        return None, json_response({"error": "Database unavailable"}, 503)
+    
+    # Parse the raw body directly (skips Flask's JSON provider dispatch). The
+    # bytes stay cached on the request so they can be queued verbatim.
+    try:
+        update_data = _loads(request.get_data())
+    except ValueError:
+        return None, json_response({"error": "Invalid JSON"}, 400)
+    
+    if not update_data:
+        return None, json_response({"error": "No data received"}, 400)
+    
+    return update_data, None
+
+
+# Update routing: the first key present in the update picks the job type
+# and bot token; anything unmatched falls through to the handler's default
+WEBHOOK_ROUTES = (
+    ('chat_join_request', 'tgms_process_join_request', TGMS_BOT_TOKEN),
+    ('callback_query', 'process_telegram_update', BOT_TOKEN),
+    ('message', 'process_telegram_update', BOT_TOKEN),
+    ('my_chat_member', 'tgms_process_update', TGMS_BOT_TOKEN),
+)
+TGMS_ROUTES = (
+    ('my_chat_member', 'tgms_process_update'),
+    ('chat_join_request', 'tgms_process_join_request'),
+    ('message', 'tgms_process_update'),
+)
 
 
 @app.route('/api/webhook', methods=['GET', 'POST'])
@@ -116,47 +545,34 @@ def webhook():
     
     # GET - Health check
     if request.method == 'GET':
-        health_status = {
-            "status": "ok",
-            "timestamp": datetime.utcnow().isoformat(),
-            "database": "connected" if engine else "not connected",
-            "environment": {
-                "DATABASE_URL": "set" if DATABASE_URL else "not set",
-                "BOT_TOKEN": "set" if os.environ.get('BOT_TOKEN') else "not set",
-                "TGMS_BOT_TOKEN": "set" if os.environ.get('TGMS_BOT_TOKEN') else "not set",
-                "SWAP_BOT_TOKEN": "set" if os.environ.get('SWAP_BOT_TOKEN') else "not set"
-            }
-        }
-        return jsonify(health_status), 200
+        return app.response_class(get_health_body(), status=200, mimetype='application/json')
     
     # POST - Process webhook
-    if not engine:
-        logger.error("❌ Database not available for webhook processing")
-        return jsonify({"error": "Database unavailable"}), 503
+    update_data, error = read_update()
+    if error:
+        return error
     
     try:
-        # Get webhook data
-        update_data = request.get_json(force=True)
-        
-        if not update_data:
-            return jsonify({"error": "No data received"}), 400
-        
         update_id = update_data.get('update_id', 'unknown')
-        logger.info(f"📨 Processing webhook update: {update_id}")
-        logger.info(f"📋 Update keys: {list(update_data.keys())}")
+        logger.debug("📨 Processing webhook update: %s", update_id)
         
-        # Log full update for debugging payments
-        if 'pre_checkout_query' in update_data or 'successful_payment' in str(update_data):
-            logger.info(f"💳 PAYMENT UPDATE: {json.dumps(update_data, indent=2)}")
+        # Verbose dumps are debug-only: str()/json.dumps of the whole update is costly
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📋 Update keys: %s", list(update_data.keys()))
+            
+            # Log full update for debugging payments
+            if 'pre_checkout_query' in update_data or 'successful_payment' in str(update_data):
+                logger.debug("💳 PAYMENT UPDATE: %s", json.dumps(update_data, indent=2))
         
         # === HANDLE PRE-CHECKOUT IMMEDIATELY (CRITICAL!) ===
         if 'pre_checkout_query' in update_data:
             logger.info("💳 PRE-CHECKOUT QUERY - Handling immediately!")
-            bot_token = os.environ.get('BOT_TOKEN')
+            bot_token = BOT_TOKEN
             
-            if not bot_token or not httpx:
+            tg_client = get_tg_client()
+            if not bot_token or tg_client is None:
                 logger.error("❌ Cannot handle pre-checkout: missing bot_token or httpx")
-                return jsonify({"error": "Configuration error"}), 500
+                return json_response({"error": "Configuration error"}, 500)
             
             try:
                 pre_checkout = update_data['pre_checkout_query']
@@ -165,7 +581,7 @@ def webhook():
                 from_user = pre_checkout.get('from', {})
                 sender_id = from_user.get('id')
                 
-                logger.info(f"Pre-checkout from user {sender_id}, payload: {invoice_payload}")
+                logger.info("Pre-checkout from user %s, payload: %s", sender_id, invoice_payload)
                 
                 # Quick validation
                 ok = True
@@ -191,103 +607,143 @@ def webhook():
                 if error_message:
                     answer_payload["error_message"] = error_message
                 
-                logger.info(f"Sending answer: {answer_payload}")
-                response = httpx.post(
-                    f"https://api.telegram.org/bot{bot_token}/answerPreCheckoutQuery",
+                logger.info("Sending answer: %s", answer_payload)
+                response = tg_client.post(
+                    _tg_url(bot_token, "answerPreCheckoutQuery"),
                     json=answer_payload,
                     timeout=5.0
                 )
                 
                 if response.status_code == 200:
-                    logger.info(f"✅ Pre-checkout answered: ok={ok}")
-                    return jsonify({"status": "ok", "pre_checkout": "answered"}), 200
+                    logger.info("✅ Pre-checkout answered: ok=%s", ok)
+                    return json_response({"status": "ok", "pre_checkout": "answered"}, 200)
                 else:
-                    logger.error(f"❌ Failed to answer pre-checkout: {response.text}")
-                    return jsonify({"error": "Failed to answer"}), 500
+                    logger.error("❌ Failed to answer pre-checkout: %s", response.text)
+                    return json_response({"error": "Failed to answer"}, 500)
                     
             except Exception as e:
-                logger.error(f"❌ Pre-checkout error: {e}", exc_info=True)
-                return jsonify({"error": str(e)}), 500
+                logger.error("❌ Pre-checkout error: %s", e, exc_info=True)
+                return json_response({"error": str(e)}, 500)
         
         # Determine job type and extract chat info
-        chat_id = None
-        callback_query_id = None
-        
-        # Detect which bot by checking the bot info in update
-        bot_id = None
-        if 'message' in update_data:
-            bot_id = update_data['message'].get('via_bot', {}).get('id')
-        
-        if 'chat_join_request' in update_data:
-            job_type = 'tgms_process_join_request'
-            bot_token = os.environ.get('TGMS_BOT_TOKEN')
-            chat_id = update_data['chat_join_request'].get('chat', {}).get('id')
-            
-        elif 'callback_query' in update_data:
-            job_type = 'process_telegram_update'
-            bot_token = os.environ.get('BOT_TOKEN')
-            callback_query_id = update_data['callback_query'].get('id')
-            chat_id = update_data['callback_query'].get('message', {}).get('chat', {}).get('id')
-            
-        elif 'message' in update_data:
-            job_type = 'process_telegram_update'
-            bot_token = os.environ.get('BOT_TOKEN')
-            chat_id = update_data['message'].get('chat', {}).get('id')
-            
-        elif 'my_chat_member' in update_data:
-            job_type = 'tgms_process_update'
-            bot_token = os.environ.get('TGMS_BOT_TOKEN')
-            chat_id = update_data['my_chat_member'].get('chat', {}).get('id')
-            
+        for key, job_type, bot_token in WEBHOOK_ROUTES:
+            sub = update_data.get(key)
+            if sub is not None:
+                break
         else:
-            job_type = 'process_telegram_update'
-            bot_token = os.environ.get('BOT_TOKEN')
+            key, job_type, bot_token, sub = None, 'process_telegram_update', BOT_TOKEN, None
         
-        if not bot_token:
-            logger.error(f"❌ Bot token not configured for job type: {job_type}")
-            return jsonify({"error": "Bot not configured"}), 500
+        callback_query_id = None
+        if key == 'callback_query':
+            callback_query_id = sub.get('id')
+            sub = sub.get('message', {})
+        chat_id = sub.get('chat', {}).get('id') if sub is not None else None
         
-        # === SEND IMMEDIATE RESPONSES ===
+        if not bot_token:
+            logger.error("❌ Bot token not configured for job type: %s", job_type)
+            return json_response({"error": "Bot not configured"}, 500)
         
-        # 1. Answer callback query if present (removes loading state)
-        if callback_query_id:
-            answer_callback_query(bot_token, callback_query_id)
+        # === SEND IMMEDIATE RESPONSES + QUEUE JOB ===
         
-        # 2. Send typing action for 5 seconds (background thread)
-        if chat_id:
-            send_typing_action(bot_token, chat_id, duration=5)
-            logger.info(f"🔄 Started typing indicator for chat {chat_id}")
+        send_immediate_responses(bot_token, chat_id, callback_query_id)
+        queue_job(job_type, bot_token, request.get_data(as_text=True))
         
-        # === INSERT JOB INTO DATABASE ===
+        # Return success (typing, and off Vercel the insert, continue in background)
+        return json_response({
+            "status": "ok",
+            "message": "Webhook processed",
+            "update_id": update_id,
+            "typing_started": bool(chat_id)
+        }, 200)
         
-        with engine.connect() as conn:
-            with conn.begin():
-                query = text("""
-                    INSERT INTO jobs (job_type, bot_token, payload, status, created_at, updated_at)
-                    VALUES (:job_type, :bot_token, :payload, 'pending', :created_at, :updated_at)
-                """)
-                
-                conn.execute(query, {
-                    'job_type': job_type,
-                    'bot_token': bot_token,
-                    'payload': json.dumps(update_data),
-                    'created_at': datetime.utcnow(),
-                    'updated_at': datetime.utcnow()
-                })
+    except Exception as e:
+        logger.error("❌ Error processing webhook: %s", e, exc_info=True)
+        return json_response({"error": "Processing failed", "details": str(e)}, 500)
+
+
+@app.route('/api/webhook_swap', methods=['GET', 'POST'])
+def webhook_swap():
+    """Webhook endpoint for Instagram Live Swap Bot"""
+    
+    if request.method == 'GET':
+        return json_response({
+            "status": "ok",
+            "bot": "Instagram Live Swap Bot",
+            "timestamp": datetime.utcnow().isoformat(),
+            "database": "connected" if engine else "not connected"
+        }, 200)
+    
+    update_data, error = read_update()
+    if error:
+        return error
+    
+    try:
+        update_id = update_data.get('update_id', 'unknown')
+        logger.debug("📨 Swap bot update: %s", update_id)
         
-        logger.info(f"✅ Job queued successfully for update: {update_id}")
+        # Queue job into database (inline on Vercel, background elsewhere)
+        queue_job('process_telegram_update', SWAP_BOT_TOKEN, request.get_data(as_text=True))
         
-        # Return success immediately (typing continues in background)
-        return jsonify({
+        return json_response({
             "status": "ok",
             "message": "Webhook processed",
-            "update_id": update_id,
-            "typing_started": bool(chat_id)
-        }), 200
+            "update_id": update_id
+        }, 200)
+        
+    except Exception as e:
+        logger.error("❌ Error: %s", e, exc_info=True)
+        return json_response({"error": str(e)}, 500)
+
+
+@app.route('/api/webhook_tgms', methods=['GET', 'POST'])
+def webhook_tgms():
+    """TGMS Bot webhook endpoint"""
+    
+    if request.method == 'GET':
+        return json_response({
+            "status": "ok",
+            "bot": "TGMS",
+            "database": "connected" if engine else "not connected"
+        }, 200)
+    
+    update_data, error = read_update()
+    if error:
+        return error
+    
+    try:
+        update_id = update_data.get('update_id', 'unknown')
+        logger.debug("📨 TGMS webhook update: %s", update_id)
+        
+        bot_token = TGMS_BOT_TOKEN
+        if not bot_token:
+            return json_response({"error": "TGMS_BOT_TOKEN not configured"}, 500)
+        
+        # Determine job type
+        for key, job_type in TGMS_ROUTES:
+            sub = update_data.get(key)
+            if sub is not None:
+                break
+        else:
+            key, job_type, sub = None, 'tgms_process_update', None
+        
+        if key == 'my_chat_member':
+            new_status = sub.get('new_chat_member', {}).get('status')
+            if new_status in {'administrator', 'creator'}:
+                job_type = 'tgms_register_group'
+        chat_id = sub.get('chat', {}).get('id') if sub is not None else None
+        
+        # Send typing
+        if chat_id:
+            send_typing_action(bot_token, chat_id)
+        
+        # Queue job (inline on Vercel, background elsewhere)
+        queue_job(job_type, bot_token, request.get_data(as_text=True))
+        
+        return json_response({"status": "ok", "bot": "TGMS", "update_id": update_id}, 200)
         
     except Exception as e:
-        logger.error(f"❌ Error processing webhook: {e}", exc_info=True)
-        return jsonify({"error": "Processing failed", "details": str(e)}), 500
+        logger.error("❌ TGMS webhook error: %s", e, exc_info=True)
+        return json_response({"error": str(e)}, 500)
 
 
 @app.route('/')
@@ -302,6 +758,10 @@ def index():
             <ul>
                 <li><a href="/api/webhook">GET /api/webhook</a> - Health check</li>
                 <li>POST /api/webhook - Process webhooks</li>
+                <li><a href="/api/webhook_swap">GET /api/webhook_swap</a> - Swap bot health check</li>
+                <li>POST /api/webhook_swap - Process swap bot webhooks</li>
+                <li><a href="/api/webhook_tgms">GET /api/webhook_tgms</a> - TGMS health check</li>
+                <li>POST /api/webhook_tgms - Process TGMS webhooks</li>
             </ul>
         </body>
     </html>
@@ -312,5 +772,7 @@ def index():
 if __name__ != '__main__':
     logger.info("🚀 Running in production mode (Vercel)")
 else:
+    # Local development only - self-hosted production should use gunicorn:
+    #   gunicorn -c gunicorn.conf.py api.webhook:app
     logger.info("🔧 Running in development mode")
-    app.run(debug=True, port=8000)
\ No newline at end of file
+    app.run(port=8000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,13 @@
+# Gunicorn settings for self-hosted (non-Vercel) deployments:
+#   gunicorn -c gunicorn.conf.py api.webhook:app
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', ':8000')
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Import the app (engine, warm-up) once in the master before forking; the
+# log listener and job writer threads start lazily inside each worker
+preload_app = True